@@ -1,21 +1,63 @@
+import concurrent.futures
+import contextlib
+import os
+import pickle
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import sqlite3
-import yfinance as yf
+import numpy as np
+from dataclasses import dataclass
 from datetime import datetime
 
+# yfinance (and the pandas stack it drags in) is imported lazily inside
+# CryptoAPI so the window appears before the heavy modules load
+
 class Database:
     """
     Handles all interactions with the SQLite database.
     Manages two tables: one for DinamicDCA plans and one for Cryptopips plans.
     """
     def __init__(self, db_name="bitage.db"):
-        self.conn = sqlite3.connect(db_name)
+        # A larger statement cache lets sqlite3 reuse compiled statements
+        # across the repeated CRUD calls the UI makes. check_same_thread is
+        # off so worker threads may write, serialized by _write_lock.
+        self.conn = sqlite3.connect(db_name, cached_statements=256, check_same_thread=False)
+        self._write_lock = threading.RLock()
+        self._in_transaction = False
         self.cursor = self.conn.cursor()
+        self._tune_connection(db_name)
         self.create_tables()
 
+    def _tune_connection(self, db_name):
+        """
+        Applies pragmas suited to an interactive desktop app: WAL turns each
+        commit into an append instead of a full-page rewrite, and relaxed
+        sync avoids an fsync per checkbox toggle.
+        """
+        pragmas = ["synchronous=NORMAL",
+                   "temp_store=MEMORY",
+                   "mmap_size=268435456",
+                   "cache_size=-20000",
+                   "busy_timeout=5000"]
+        if db_name != ":memory:":
+            # WAL only applies to on-disk databases
+            pragmas.insert(0, "journal_mode=WAL")
+        for pragma in pragmas:
+            self.cursor.execute(f"PRAGMA {pragma}")
+
     def create_tables(self):
         """Creates the necessary tables and adds the 'sellplan_disabled' column if it doesn't exist."""
+        # sqlite3 only opens implicit transactions for DML, so BEGIN
+        # explicitly to commit all DDL and migrations in one transaction
+        # instead of journaling each statement separately
+        with self.conn:
+            self.cursor.execute("BEGIN")
+            self._create_tables_inner()
+
+    def _create_tables_inner(self):
         self.cursor.execute('''
         CREATE TABLE IF NOT EXISTS dinamic_dca_plans (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -25,7 +67,8 @@ class Database:
             athv_date TEXT NOT NULL,
             buyplan TEXT,
             sellplan TEXT,
-            sellplan_disabled TEXT
+            sellplan_disabled TEXT,
+            sellplan_disabled_mask INTEGER DEFAULT 0
         )''')
         self.cursor.execute('''
         CREATE TABLE IF NOT EXISTS cryptopips_plans (
@@ -34,7 +77,8 @@ class Database:
             ticker TEXT NOT NULL,
             precio_compra REAL NOT NULL,
             sellplan TEXT,
-            sellplan_disabled TEXT
+            sellplan_disabled TEXT,
+            sellplan_disabled_mask INTEGER DEFAULT 0
         )''')
         
         # Add the new column for disabled sell rules if it doesn't exist, to support older DBs
@@ -47,104 +91,541 @@ class Database:
         except sqlite3.OperationalError:
             pass # Column already exists
 
-        self.conn.commit()
+        # Bitmask replacement for the semicolon-joined text column: bit i set
+        # means sell rule i is disabled
+        try:
+            self.cursor.execute("ALTER TABLE dinamic_dca_plans ADD COLUMN sellplan_disabled_mask INTEGER DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass # Column already exists
+        try:
+            self.cursor.execute("ALTER TABLE cryptopips_plans ADD COLUMN sellplan_disabled_mask INTEGER DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass # Column already exists
+
+        # Covering indexes for the plan list: the (name, id) projection is
+        # answered from the index alone, already sorted
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_dca_name_id ON dinamic_dca_plans(name, id)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_pips_name_id ON cryptopips_plans(name, id)")
+
+        # Ticker lookups (e.g. filtering plans by symbol) without a table scan;
+        # name is already covered by the (name, id) indexes above
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_dca_ticker ON dinamic_dca_plans(ticker)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_pips_ticker ON cryptopips_plans(ticker)")
+
+        self._migrate_disabled_masks()
+
+    def _migrate_disabled_masks(self):
+        """One-time migration of legacy semicolon-joined disabled strings into the bitmask."""
+        for table in ("dinamic_dca_plans", "cryptopips_plans"):
+            rows = self.cursor.execute(
+                f"SELECT id, sellplan_disabled FROM {table} "
+                "WHERE sellplan_disabled != '' AND sellplan_disabled IS NOT NULL "
+                "AND sellplan_disabled_mask = 0"
+            ).fetchall()
+            for plan_id, disabled_str in rows:
+                mask = 0
+                for i in disabled_str.split(';'):
+                    if i:
+                        mask |= 1 << int(i)
+                # Clear the legacy string too, so the migration can't
+                # re-impose stale state once the user edits the mask
+                self.cursor.execute(
+                    f"UPDATE {table} SET sellplan_disabled_mask=?, sellplan_disabled='' WHERE id=?",
+                    (mask, plan_id))
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Groups several writes into a single commit, e.g. for bulk imports:
+
+            with db.transaction():
+                db.add_dinamic_dca(...)
+                db.add_cryptopips(...)
+
+        All statements share one fsync; any exception rolls everything back.
+        """
+        with self._write_lock:
+            self._in_transaction = True
+            try:
+                yield
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            finally:
+                self._in_transaction = False
+
+    def _write(self, sql, params=()):
+        """Executes a mutating statement, serialized across threads. Commits
+        immediately unless an enclosing transaction() defers it."""
+        with self._write_lock:
+            self.cursor.execute(sql, params)
+            if not self._in_transaction:
+                self.conn.commit()
+
+    def _write_many(self, sql, rows):
+        """executemany variant of _write."""
+        with self._write_lock:
+            self.cursor.executemany(sql, rows)
+            if not self._in_transaction:
+                self.conn.commit()
 
     def add_dinamic_dca(self, name, ticker, athv, athv_date, buyplan, sellplan):
         # New plans start with no disabled sell rules
-        self.cursor.execute(
-            "INSERT INTO dinamic_dca_plans (name, ticker, athv, athv_date, buyplan, sellplan, sellplan_disabled) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (name, ticker, athv, athv_date, buyplan, sellplan, '')
+        self.add_many_dinamic_dca([(name, ticker, athv, athv_date, buyplan, sellplan)])
+
+    def add_many_dinamic_dca(self, rows):
+        """Bulk-inserts (name, ticker, athv, athv_date, buyplan, sellplan) rows in one transaction."""
+        self._write_many(
+            "INSERT INTO dinamic_dca_plans (name, ticker, athv, athv_date, buyplan, sellplan, sellplan_disabled) VALUES (?, ?, ?, ?, ?, ?, '')",
+            rows
         )
-        self.conn.commit()
 
     def get_all_dinamic_dca(self):
         self.cursor.execute("SELECT * FROM dinamic_dca_plans")
         return self.cursor.fetchall()
 
+    def list_dinamic_dca(self):
+        """Returns (id, name) pairs for the plan list, sorted by name."""
+        self.cursor.execute("SELECT id, name FROM dinamic_dca_plans ORDER BY name")
+        return self.cursor.fetchall()
+
+    def get_dinamic_dca(self, plan_id):
+        """Fetches a single plan by primary key."""
+        self.cursor.execute("SELECT * FROM dinamic_dca_plans WHERE id=?", (plan_id,))
+        return self.cursor.fetchone()
+
     def update_dinamic_dca(self, plan_id, name, ticker, athv, athv_date, buyplan, sellplan):
         # When editing, we preserve the existing disabled rules
-        self.cursor.execute(
+        self._write(
             "UPDATE dinamic_dca_plans SET name=?, ticker=?, athv=?, athv_date=?, buyplan=?, sellplan=? WHERE id=?",
             (name, ticker, athv, athv_date, buyplan, sellplan, plan_id)
         )
-        self.conn.commit()
 
     def delete_dinamic_dca(self, plan_id):
-        self.cursor.execute("DELETE FROM dinamic_dca_plans WHERE id=?", (plan_id,))
-        self.conn.commit()
+        self._write("DELETE FROM dinamic_dca_plans WHERE id=?", (plan_id,))
 
     def add_cryptopips(self, name, ticker, precio_compra, sellplan):
-        self.cursor.execute(
-            "INSERT INTO cryptopips_plans (name, ticker, precio_compra, sellplan, sellplan_disabled) VALUES (?, ?, ?, ?, ?)",
-            (name, ticker, precio_compra, sellplan, '')
+        self.add_many_cryptopips([(name, ticker, precio_compra, sellplan)])
+
+    def add_many_cryptopips(self, rows):
+        """Bulk-inserts (name, ticker, precio_compra, sellplan) rows in one transaction."""
+        self._write_many(
+            "INSERT INTO cryptopips_plans (name, ticker, precio_compra, sellplan, sellplan_disabled) VALUES (?, ?, ?, ?, '')",
+            rows
         )
-        self.conn.commit()
 
     def get_all_cryptopips(self):
         self.cursor.execute("SELECT * FROM cryptopips_plans")
         return self.cursor.fetchall()
 
+    def list_cryptopips(self):
+        """Returns (id, name) pairs for the plan list, sorted by name."""
+        self.cursor.execute("SELECT id, name FROM cryptopips_plans ORDER BY name")
+        return self.cursor.fetchall()
+
+    def get_cryptopips(self, plan_id):
+        """Fetches a single plan by primary key."""
+        self.cursor.execute("SELECT * FROM cryptopips_plans WHERE id=?", (plan_id,))
+        return self.cursor.fetchone()
+
     def update_cryptopips(self, plan_id, name, ticker, precio_compra, sellplan):
-        self.cursor.execute(
+        self._write(
             "UPDATE cryptopips_plans SET name=?, ticker=?, precio_compra=?, sellplan=? WHERE id=?",
             (name, ticker, precio_compra, sellplan, plan_id)
         )
-        self.conn.commit()
 
     def delete_cryptopips(self, plan_id):
-        self.cursor.execute("DELETE FROM cryptopips_plans WHERE id=?", (plan_id,))
-        self.conn.commit()
+        self._write("DELETE FROM cryptopips_plans WHERE id=?", (plan_id,))
 
-    def update_sell_disabled_status(self, table_name, plan_id, disabled_str):
-        """Specifically updates the disabled status of sell rules for a given plan."""
-        self.cursor.execute(f"UPDATE {table_name} SET sellplan_disabled=? WHERE id=?", (disabled_str, plan_id))
-        self.conn.commit()
+    def update_sell_disabled_mask(self, table_name, plan_id, mask):
+        """Specifically updates the disabled-rule bitmask for a given plan."""
+        # Fixed literal SQL per table (instead of an f-string) so the
+        # connection's statement cache can reuse the compiled statement
+        if table_name == "dinamic_dca_plans":
+            self._write("UPDATE dinamic_dca_plans SET sellplan_disabled_mask=? WHERE id=?", (mask, plan_id))
+        else:
+            self._write("UPDATE cryptopips_plans SET sellplan_disabled_mask=? WHERE id=?", (mask, plan_id))
 
-    def __del__(self):
+    def close(self):
+        """Closes the connection. Called explicitly on app shutdown instead of
+        relying on __del__, which can race with interpreter teardown."""
         self.conn.close()
 
 class CryptoAPI:
     """
     Handles fetching cryptocurrency data from Yahoo Finance.
+    Results are cached in memory for CACHE_TTL seconds so repeated queries
+    (e.g. toggling sell rules) don't hit the network, and daily history is
+    persisted to disk so restarts only fetch the recent delta.
     """
-    @staticmethod
-    def get_crypto_data(ticker):
+    CACHE_TTL = 60  # seconds before a ticker is re-fetched
+    CACHE_DIR = os.path.join(os.path.expanduser("~"), ".bitage_cache")
+
+    _cache = {}    # ticker -> (fetch timestamp, (price, ath, ath_date, low_since_ath))
+    _tickers = {}  # ticker -> long-lived yf.Ticker, so its internal state stays warm
+    _yf = None     # lazily imported yfinance module
+
+    @classmethod
+    def _yfinance(cls):
+        """Imports yfinance on first use to keep application startup fast."""
+        if cls._yf is None:
+            import yfinance
+            cls._yf = yfinance
+        return cls._yf
+
+    @classmethod
+    def _get_ticker(cls, ticker):
+        """Returns the shared yf.Ticker for a symbol, creating it on first use."""
+        stock = cls._tickers.get(ticker)
+        if stock is None:
+            stock = cls._tickers[ticker] = cls._yfinance().Ticker(ticker)
+        return stock
+
+    @classmethod
+    def _cache_path(cls, ticker):
+        return os.path.join(cls.CACHE_DIR, f"{ticker}.pkl")
+
+    @classmethod
+    def _load_history(cls, ticker):
+        """Loads daily history, using the disk cache and fetching only the recent delta."""
+        import pandas as pd
+
+        hist = None
+        fresh = False
+        path = cls._cache_path(ticker)
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    hist = pickle.load(f)
+                # A snapshot written within the last hour is served as-is,
+                # so warm starts skip the network entirely
+                fresh = time.time() - os.path.getmtime(path) < 3600
+            except Exception:
+                hist = None  # Corrupt cache file, fall back to a full fetch
+
+        if hist is not None and not hist.empty and fresh:
+            return hist
+
+        stock = cls._get_ticker(ticker)
+        if hist is None or hist.empty:
+            hist = stock.history(period="max")
+        else:
+            # Fetch everything since the snapshot's last bar, so a snapshot
+            # of any age merges without leaving a gap in the history
+            recent = stock.history(start=hist.index[-1])
+            if not recent.empty:
+                hist = pd.concat([hist, recent])
+                hist = hist[~hist.index.duplicated(keep='last')].sort_index()
+
+        if not hist.empty:
+            try:
+                os.makedirs(cls.CACHE_DIR, exist_ok=True)
+                with open(path, "wb") as f:
+                    pickle.dump(hist, f)
+            except OSError:
+                pass  # Disk cache is best-effort
+        return hist
+
+    @classmethod
+    def get_many(cls, tickers):
+        """
+        Fetches data for several tickers in one batched download and fills
+        the in-memory cache, so a "refresh all" costs a single request
+        instead of one per symbol.
+        """
+        tickers = [t for t in tickers if t]
+        if not tickers:
+            return
+        try:
+            df = cls._yfinance().download(tickers=" ".join(tickers), period="max",
+                                          group_by='ticker', threads=True, progress=False)
+        except Exception as e:
+            print(f"Error batch fetching {tickers}: {e}")
+            return
+
+        now = time.monotonic()
+        for ticker in tickers:
+            try:
+                # yf.download may or may not group columns under the ticker
+                # (single-ticker downloads are MultiIndexed on recent releases),
+                # so select by layout rather than by request count
+                hist = df[ticker] if ticker in df.columns.get_level_values(0) else df
+                hist = hist.dropna(subset=['Close'])
+                if hist.empty:
+                    continue
+                high = hist['High'].values
+                idx = int(high.argmax())
+                ath = float(high[idx])
+                ath_date = hist.index[idx]
+                current_price = float(hist['Close'].values[-1])
+                # Positional slice on the raw array: no DatetimeIndex lookup
+                # and no intermediate frame copy
+                low_since_ath = float(hist['Low'].values[idx:].min())
+                cls._cache[ticker] = (now, (current_price, ath, ath_date, low_since_ath))
+            except Exception as e:
+                print(f"Error processing batch data for {ticker}: {e}")
+
+    @classmethod
+    def peek(cls, ticker):
+        """Returns the cached data tuple if still fresh, without touching the network."""
+        cached = cls._cache.get(ticker)
+        if cached and time.monotonic() - cached[0] < cls.CACHE_TTL:
+            return cached[1]
+        return None
+
+    @classmethod
+    def get_crypto_data(cls, ticker):
         """
         Fetches current price, ATH, date of ATH, and the lowest price since the ATH.
+        Served from the in-memory cache when the last fetch is recent enough.
+        Failed fetches are cached too, so the UI doesn't retry in a tight loop.
         """
+        cached = cls.peek(ticker)
+        if cached is not None:
+            return cached
+
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="max")
+            hist = cls._load_history(ticker)
             if hist.empty:
-                return None, None, None, None
-
-            current_price = hist['Close'].iloc[-1]
-            ath = hist['High'].max()
-            ath_date = hist['High'].idxmax()
-            hist_since_ath = hist.loc[ath_date:]
-            low_since_ath = hist_since_ath['Low'].min()
-            
-            return current_price, ath, ath_date, low_since_ath
+                result = (None, None, None, None)
+            else:
+                # Single-pass NumPy reductions over the raw arrays, instead
+                # of separate pandas max/idxmax traversals
+                high = hist['High'].values
+                idx = int(high.argmax())
+                ath = float(high[idx])
+                ath_date = hist.index[idx]
+                current_price = float(hist['Close'].values[-1])
+                # Positional slice on the raw array: no DatetimeIndex lookup
+                # and no intermediate frame copy
+                low_since_ath = float(hist['Low'].values[idx:].min())
+                result = (current_price, ath, ath_date, low_since_ath)
         except Exception as e:
             print(f"Error fetching data for {ticker}: {e}")
-            return None, None, None, None
+            result = (None, None, None, None)
+
+        cls._cache[ticker] = (time.monotonic(), result)
+        return result
+
+@dataclass
+class ParsedSellPlan:
+    """
+    A sell plan parsed once into parallel arrays (one entry per rule).
+    Invalid rules get a +inf target so vectorized comparisons never match them.
+    """
+    raw: list       # original rule strings, for display
+    targets: np.ndarray    # price multiplier per rule
+    positions: np.ndarray  # % of position to sell per rule
+
+
+@dataclass
+class ParsedBuyPlan:
+    """
+    A buy plan parsed once into parallel arrays. Threshold-only rules get
+    lower = -inf; invalid rules get bounds that can never match.
+    """
+    raw: list
+    uppers: np.ndarray
+    lowers: np.ndarray
+    amounts: np.ndarray
+
+
+# Parsed plans cached by their raw string, so re-selecting a plan or
+# toggling a rule never re-parses the same plan text
+_SELL_PLAN_CACHE = {}
+_BUY_PLAN_CACHE = {}
+
+
+def parse_sell_plan(plan_string):
+    """Parses a 'multiplier,position;...' sell plan string into arrays."""
+    parsed = _SELL_PLAN_CACHE.get(plan_string)
+    if parsed is not None:
+        return parsed
+
+    raw = plan_string.split(';') if plan_string else []
+    targets = np.full(len(raw), np.inf)
+    positions = np.full(len(raw), np.nan)
+    for i, rule in enumerate(raw):
+        parts = rule.strip().split(',')
+        try:
+            if len(parts) == 2:
+                targets[i] = float(parts[0])
+                positions[i] = float(parts[1])
+        except ValueError:
+            pass # Invalid rule keeps its never-matching sentinel
+
+    parsed = ParsedSellPlan(raw, targets, positions)
+    _SELL_PLAN_CACHE[plan_string] = parsed
+    return parsed
+
+
+def parse_buy_plan(plan_string):
+    """Parses a buy plan string ('upper,amount' or 'upper,lower,amount' rules) into arrays."""
+    parsed = _BUY_PLAN_CACHE.get(plan_string)
+    if parsed is not None:
+        return parsed
+
+    raw = plan_string.split(';') if plan_string else []
+    uppers = np.full(len(raw), -np.inf)
+    lowers = np.full(len(raw), np.inf)
+    amounts = np.full(len(raw), np.nan)
+    for i, rule in enumerate(raw):
+        parts = rule.strip().split(',')
+        try:
+            if len(parts) == 2:
+                uppers[i] = float(parts[0])
+                lowers[i] = -np.inf
+                amounts[i] = float(parts[1])
+            elif len(parts) == 3:
+                uppers[i] = float(parts[0])
+                lowers[i] = float(parts[1])
+                amounts[i] = float(parts[2])
+        except ValueError:
+            uppers[i], lowers[i] = -np.inf, np.inf # Never matches
+
+    parsed = ParsedBuyPlan(raw, uppers, lowers, amounts)
+    _BUY_PLAN_CACHE[plan_string] = parsed
+    return parsed
+
+
+def match_sell_rule(sellplan, base_price, price, disabled_mask):
+    """
+    Evaluates a sell plan against the current price and returns the
+    recommendation text for the first enabled matching rule, or None.
+    Shared by the DinamicDCA and Cryptopips recommendation renderers,
+    which only differ in the base price the targets are relative to.
+    """
+    sell = parse_sell_plan(sellplan)
+    targets = base_price * sell.targets
+    enabled = (disabled_mask >> np.arange(targets.size)) & 1 == 0
+    hits = (price >= targets) & enabled
+    if not hits.any():
+        return None
+    i = int(hits.argmax())
+    return f"SELL {sell.positions[i]}% of position (Price >= {targets[i]:,.2f} USD)"
+
 
 class App(tk.Tk):
     """
     Main application class. Sets up the GUI and handles user interactions.
     """
+    # Label styles for the details pane, registered once as named ttk styles
+    # so Tk caches the fonts instead of re-resolving them per label
+    STYLES = {
+        "h1": {"font": ("Helvetica", 16, "bold"), "foreground": "#003366"},
+        "h2": {"font": ("Helvetica", 13, "bold"), "foreground": "#0055A4"},
+        "h2_plan": {"font": ("Helvetica", 13, "bold"), "foreground": "#444444"},
+        "plan_text": {"font": ("Courier", 11)},
+        "bold": {"font": ("Helvetica", 11, "bold")},
+        "bold_green": {"font": ("Helvetica", 11, "bold"), "foreground": "#1E8449"},
+        "bold_red": {"font": ("Helvetica", 11, "bold"), "foreground": "#C0392B"},
+        "error": {"foreground": "red"},
+        "buy": {"font": ("Helvetica", 11, "bold"), "foreground": "#27AE60"},
+        "sell": {"font": ("Helvetica", 11, "bold"), "foreground": "#E67E22"},
+    }
+
     def __init__(self):
         super().__init__()
         self.title("Bitage - Crypto Investment Manager")
         self.geometry("1200x700")
         self.db = Database()
         self.api = CryptoAPI()
+
+        style = ttk.Style(self)
+        for name, opts in self.STYLES.items():
+            style.configure(f"{name}.TLabel", **opts)
         
         self.current_plan_type = tk.StringVar(value="DinamicDCA")
         self.sell_rule_vars = [] # To hold the BooleanVar for each sell rule checkbox
-        
+
+        # Worker pool for warming the price cache without blocking the UI
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+        # Completed background fetches are delivered to the UI thread here
+        self.fetch_queue = queue.Queue()
+        self._pending_fetches = set()
+        self._pending_write = None  # after() id of a debounced toggle write
+        self._rec_frame = None      # sub-frame holding "Recommended Actions"
+
+        # Widget pools for the details pane: Tk widget construction is slow,
+        # so cleared widgets are kept and reconfigured on the next render
+        self._label_pool = []
+        self._used_labels = 0
+        self._sep_pool = []
+        self._used_seps = 0
+        self._rule_row_pool = []  # (frame, checkbutton, label) per sell rule
+        self._used_rule_rows = 0
+
+        self._closed = False
+        self._tree_items = {}  # plan id -> (treeview iid, displayed name)
+        self._tree_plan_type = None
+
         self.create_widgets()
         self.refresh_plan_list()
+        self.refresh_all_prices()
+        self.after(50, self._drain_fetch_queue)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _on_close(self):
+        """Shuts down workers and the DB connection before destroying the window."""
+        self.destroy()
+
+    def destroy(self):
+        """Releases workers and the DB connection on any teardown path, not
+        just the window-manager close button."""
+        if not self._closed:
+            self._closed = True
+            self._executor.shutdown(wait=False)
+            self.db.close()
+        super().destroy()
+
+    def _fetch_async(self, ticker):
+        """Fetches ticker data on a worker thread and queues a UI refresh when done."""
+        if ticker in self._pending_fetches:
+            return
+        self._pending_fetches.add(ticker)
+
+        def worker():
+            self.api.get_crypto_data(ticker)
+            self.fetch_queue.put(ticker)
+
+        self._executor.submit(worker)
+
+    def _drain_fetch_queue(self):
+        """Polls for completed background fetches and refreshes the affected view."""
+        try:
+            while True:
+                ticker = self.fetch_queue.get_nowait()
+                self._pending_fetches.discard(ticker)
+                # Completions are matched by ticker, not by the plan that
+                # started the fetch: several plans can share a symbol, and
+                # whichever one is selected now should get the refresh
+                selected = self.plan_tree.selection()
+                if not selected:
+                    continue
+                plan_id = self.plan_tree.item(selected[0])["values"][0]
+                if self.current_plan_type.get() == "DinamicDCA":
+                    plan = self.db.get_dinamic_dca(plan_id)
+                    if plan and plan[2] == ticker:
+                        self.display_dinamic_dca_details(plan_id)
+                else:
+                    plan = self.db.get_cryptopips(plan_id)
+                    if plan and plan[2] == ticker:
+                        self.display_cryptopips_details(plan_id)
+        except queue.Empty:
+            pass
+        self.after(50, self._drain_fetch_queue)
+
+    def refresh_all_prices(self):
+        """
+        Pre-fetches data for every ticker in parallel so the cache is warm
+        when a plan is selected. Reschedules itself to keep prices fresh.
+        """
+        tickers = {p[2] for p in self.db.get_all_dinamic_dca()}
+        tickers |= {p[2] for p in self.db.get_all_cryptopips()}
+        if tickers:
+            self._executor.submit(self.api.get_many, sorted(tickers))
+        self.after(30000, self.refresh_all_prices)
 
     def create_widgets(self):
         """Creates all the GUI components."""
@@ -198,24 +679,60 @@ class App(tk.Tk):
 
         self.details_content_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
 
-    def _pack_label(self, text, style=""):
-        """Helper to pack a styled label into the details frame."""
-        styles = {
-            "h1": {"font": ("Helvetica", 16, "bold"), "foreground": "#003366"},
-            "h2": {"font": ("Helvetica", 13, "bold"), "foreground": "#0055A4"},
-            "h2_plan": {"font": ("Helvetica", 13, "bold"), "foreground": "#444444"},
-            "plan_text": {"font": ("Courier", 11)},
-            "bold": {"font": ("Helvetica", 11, "bold")},
-            "bold_green": {"font": ("Helvetica", 11, "bold"), "foreground": "#1E8449"},
-            "bold_red": {"font": ("Helvetica", 11, "bold"), "foreground": "#C0392B"},
-            "error": {"foreground": "red"},
-            "buy": {"font": ("Helvetica", 11, "bold"), "foreground": "#27AE60"},
-            "sell": {"font": ("Helvetica", 11, "bold"), "foreground": "#E67E22"},
-        }
-        label = ttk.Label(self.details_content_frame, text=text, wraplength=700, justify=tk.LEFT, **styles.get(style, {}))
+    def _pack_label(self, text, style="", parent=None):
+        """
+        Helper to pack a styled label into the details frame (or a sub-frame).
+        Labels in the main frame come from the pool and are reconfigured
+        rather than recreated.
+        """
+        style_name = f"{style}.TLabel" if style in self.STYLES else "TLabel"
+        if parent is not None:
+            label = ttk.Label(parent, text=text, wraplength=700, justify=tk.LEFT, style=style_name)
+            label.pack(anchor='w', pady=(0, 2))
+            return label
+
+        if self._used_labels < len(self._label_pool):
+            label = self._label_pool[self._used_labels]
+            label.configure(text=text, style=style_name)
+        else:
+            label = ttk.Label(self.details_content_frame, text=text, wraplength=700, justify=tk.LEFT, style=style_name)
+            self._label_pool.append(label)
+        self._used_labels += 1
         label.pack(anchor='w', pady=(0, 2))
         return label
 
+    def _pack_separator(self, parent=None):
+        """Packs a pooled horizontal separator into the details frame."""
+        if parent is not None:
+            sep = ttk.Separator(parent, orient='horizontal')
+            sep.pack(fill='x', pady=10)
+            return sep
+
+        if self._used_seps < len(self._sep_pool):
+            sep = self._sep_pool[self._used_seps]
+        else:
+            sep = ttk.Separator(self.details_content_frame, orient='horizontal')
+            self._sep_pool.append(sep)
+        self._used_seps += 1
+        sep.pack(fill='x', pady=10)
+        return sep
+
+    def _pack_rule_row(self):
+        """Returns a pooled (frame, checkbutton, label) row for an interactive sell rule."""
+        if self._used_rule_rows < len(self._rule_row_pool):
+            row = self._rule_row_pool[self._used_rule_rows]
+        else:
+            frame = ttk.Frame(self.details_content_frame)
+            chk = ttk.Checkbutton(frame)
+            chk.pack(side='left')
+            label = ttk.Label(frame, style="plan_text.TLabel")
+            label.pack(side='left')
+            row = (frame, chk, label)
+            self._rule_row_pool.append(row)
+        self._used_rule_rows += 1
+        row[0].pack(anchor='w', fill='x')
+        return row
+
     def _display_static_buy_plan(self, plan_string, base_price, rule_type, base_price_label):
         """Displays the buy plan rules as static text."""
         if not plan_string:
@@ -223,25 +740,20 @@ class App(tk.Tk):
             return
 
         self._pack_label(f"Calculation Base: {base_price_label} = {base_price:,.2f} USD", "plan_text")
-        rules = plan_string.split(';')
-        for rule in rules:
-            parts = rule.strip().split(',')
-            try:
-                if len(parts) == 2:
-                    perc, amount = float(parts[0]), float(parts[1])
-                    target_price = base_price * perc
-                    self._pack_label(f"  p < {target_price:,.3f} ({perc:.2f}) → Buy {amount}€", "plan_text")
-                elif len(parts) == 3:
-                    upper_perc, lower_perc, amount = float(parts[0]), float(parts[1]), float(parts[2])
-                    upper_price, lower_price = base_price * upper_perc, base_price * lower_perc
-                    self._pack_label(f"  p ~ {lower_price:,.3f} - {upper_price:,.3f} ({lower_perc:.2f}-{upper_perc:.2f}) → Buy {amount}€", "plan_text")
-            except (ValueError, IndexError):
+        plan = parse_buy_plan(plan_string)
+        for i, rule in enumerate(plan.raw):
+            if np.isneginf(plan.uppers[i]):
                 self._pack_label(f"  Invalid rule: '{rule}'", "plan_text")
+            elif np.isneginf(plan.lowers[i]):
+                target_price = base_price * plan.uppers[i]
+                self._pack_label(f"  p < {target_price:,.3f} ({plan.uppers[i]:.2f}) → Buy {plan.amounts[i]}€", "plan_text")
+            else:
+                upper_price, lower_price = base_price * plan.uppers[i], base_price * plan.lowers[i]
+                self._pack_label(f"  p ~ {lower_price:,.3f} - {upper_price:,.3f} ({plan.lowers[i]:.2f}-{plan.uppers[i]:.2f}) → Buy {plan.amounts[i]}€", "plan_text")
 
-    def _display_interactive_sell_plan(self, plan_id, plan_type, sell_plan_str, disabled_str, base_price, base_price_label):
+    def _display_interactive_sell_plan(self, plan_id, plan_type, sell_plan_str, disabled_mask, base_price, base_price_label):
         """Displays sell plan rules with interactive checkboxes."""
         self.sell_rule_vars = []
-        disabled_indices = [int(i) for i in disabled_str.split(';') if i]
         
         self._pack_label(f"Calculation Base: {base_price_label} = {base_price:,.2f} USD", "plan_text")
         
@@ -249,41 +761,55 @@ class App(tk.Tk):
             self._pack_label("Not defined.", "plan_text")
             return
 
-        rules = sell_plan_str.split(';')
-        for i, rule in enumerate(rules):
-            rule_frame = ttk.Frame(self.details_content_frame)
-            rule_frame.pack(anchor='w', fill='x')
-            
-            is_enabled = i not in disabled_indices
+        plan = parse_sell_plan(sell_plan_str)
+        for i, rule in enumerate(plan.raw):
+            _, chk, label = self._pack_rule_row()
+
+            is_enabled = not disabled_mask >> i & 1
             var = tk.BooleanVar(value=is_enabled)
             self.sell_rule_vars.append(var)
-            
+
             # The command will be a lambda that captures the current state
-            chk = ttk.Checkbutton(rule_frame, variable=var, command=lambda: self._on_sell_rule_toggled(plan_id, plan_type))
-            chk.pack(side='left')
+            chk.configure(variable=var, command=lambda: self._on_sell_rule_toggled(plan_id, plan_type))
 
-            try:
-                parts = rule.strip().split(',')
-                perc, pos_perc = float(parts[0]), float(parts[1])
-                target_price = base_price * perc
-                rule_text = f"p > {target_price:,.3f} ({perc:.1f}) → Sell {pos_perc}%"
-                ttk.Label(rule_frame, text=rule_text, font=("Courier", 11)).pack(side='left')
-            except (ValueError, IndexError):
-                ttk.Label(rule_frame, text=f"Invalid rule: '{rule}'", font=("Courier", 11)).pack(side='left')
+            if np.isinf(plan.targets[i]):
+                rule_text = f"Invalid rule: '{rule}'"
+            else:
+                target_price = base_price * plan.targets[i]
+                rule_text = f"p > {target_price:,.3f} ({plan.targets[i]:.1f}) → Sell {plan.positions[i]}%"
+            label.configure(text=rule_text)
 
     def _on_sell_rule_toggled(self, plan_id, plan_type):
-        """Callback when a sell rule checkbox is toggled."""
-        disabled_indices = [str(i) for i, var in enumerate(self.sell_rule_vars) if not var.get()]
-        disabled_str = ";".join(disabled_indices)
-        
+        """
+        Callback when a sell rule checkbox is toggled. Debounced so a burst
+        of clicks results in a single DB write and a single refresh of the
+        "Recommended Actions" section.
+        """
+        # Snapshot the state now: the vars list is rebuilt if the user
+        # switches plans before the debounce timer fires
+        mask = sum((not var.get()) << i for i, var in enumerate(self.sell_rule_vars))
+
+        if self._pending_write:
+            self.after_cancel(self._pending_write)
+        self._pending_write = self.after(300, lambda: self._commit_toggle(plan_id, plan_type, mask))
+
+    def _commit_toggle(self, plan_id, plan_type, mask):
+        """Persists the toggled checkbox state and refreshes only the recommendations."""
+        self._pending_write = None
         table_name = "dinamic_dca_plans" if plan_type == "DinamicDCA" else "cryptopips_plans"
-        self.db.update_sell_disabled_status(table_name, plan_id, disabled_str)
-        
-        # Refresh the entire view to update "Recommended Actions"
+        self.db.update_sell_disabled_mask(table_name, plan_id, mask)
+
+        # Only re-render if the toggled plan is still the one on screen;
+        # the user may have selected another plan during the debounce window
+        selected = self.plan_tree.selection()
+        if not (selected and self.plan_tree.item(selected[0])["values"][0] == plan_id
+                and self.current_plan_type.get() == plan_type):
+            return
+
         if plan_type == "DinamicDCA":
-            self.display_dinamic_dca_details(plan_id)
+            self._render_dca_recommendations(plan_id)
         else:
-            self.display_cryptopips_details(plan_id)
+            self._render_pips_recommendations(plan_id)
 
     def switch_plan_type(self):
         """Handles switching between plan types and refreshes the list."""
@@ -291,20 +817,50 @@ class App(tk.Tk):
         self.clear_details()
 
     def refresh_plan_list(self):
-        """Reloads the list of plans from the database into the treeview."""
-        for i in self.plan_tree.get_children():
-            self.plan_tree.delete(i)
-        
+        """
+        Diff-updates the treeview against the database: rows are inserted,
+        renamed or deleted individually, so a single-plan change costs a
+        couple of Tk calls instead of a full clear-and-reinsert.
+        """
         plan_type = self.current_plan_type.get()
-        plans = self.db.get_all_dinamic_dca() if plan_type == "DinamicDCA" else self.db.get_all_cryptopips()
-            
-        for plan in plans:
-            self.plan_tree.insert("", "end", values=(plan[0], plan[1]))
+        if plan_type != self._tree_plan_type:
+            # Switching plan type replaces the whole list; start clean
+            for iid in self.plan_tree.get_children():
+                self.plan_tree.delete(iid)
+            self._tree_items = {}
+            self._tree_plan_type = plan_type
+
+        plans = self.db.list_dinamic_dca() if plan_type == "DinamicDCA" else self.db.list_cryptopips()
+
+        current_ids = {plan[0] for plan in plans}
+        for plan_id in list(self._tree_items):
+            if plan_id not in current_ids:
+                iid, _ = self._tree_items.pop(plan_id)
+                self.plan_tree.delete(iid)
+
+        # plans is sorted by name; unchanged rows keep their relative order,
+        # so only new and renamed rows need positioning
+        for index, (plan_id, name) in enumerate(plans):
+            entry = self._tree_items.get(plan_id)
+            if entry is None:
+                iid = self.plan_tree.insert("", index, values=(plan_id, name))
+                self._tree_items[plan_id] = (iid, name)
+            elif entry[1] != name:
+                iid = entry[0]
+                self.plan_tree.item(iid, values=(plan_id, name))
+                self.plan_tree.move(iid, "", index)
+                self._tree_items[plan_id] = (iid, name)
 
     def clear_details(self):
-        """Clears the details and analysis frame."""
+        """Clears the details and analysis frame, keeping pooled widgets for reuse."""
+        pooled = set(self._label_pool) | set(self._sep_pool)
+        pooled |= {frame for frame, _, _ in self._rule_row_pool}
         for widget in self.details_content_frame.winfo_children():
-            widget.destroy()
+            if widget in pooled:
+                widget.pack_forget()
+            else:
+                widget.destroy()
+        self._used_labels = self._used_seps = self._used_rule_rows = 0
 
     def on_plan_select(self, event):
         """Triggered when a plan is selected. Fetches data and displays analysis."""
@@ -321,133 +877,182 @@ class App(tk.Tk):
             self.display_cryptopips_details(selected_id)
 
     def display_dinamic_dca_details(self, plan_id):
-        """Fetches and displays details for a DinamicDCA plan."""
-        plan = next((p for p in self.db.get_all_dinamic_dca() if p[0] == plan_id), None)
+        """Fetches and displays details for a DinamicDCA plan, one section at a time."""
+        plan = self.db.get_dinamic_dca(plan_id)
         if not plan: return
 
         self.clear_details()
-        _, name, ticker, athv, athv_date, buyplan, sellplan, sellplan_disabled = plan
-        
-        self._pack_label(f"--- {name} ({ticker}) ---", "h1")
-        self._pack_label(f"Manual ATH (athv): {athv:,.2f} USD (Date: {athv_date})", "bold")
-        ttk.Separator(self.details_content_frame, orient='horizontal').pack(fill='x', pady=10)
-        
-        price, athn, athn_date, low_since_ath = self.api.get_crypto_data(ticker)
-        
+        _, name, ticker, athv, athv_date, buyplan, sellplan, _, disabled_mask = plan
+
+        # Never block the event loop on the network: use cached data if fresh,
+        # otherwise kick off a background fetch that re-renders on arrival.
+        data = self.api.peek(ticker)
+        if data is None:
+            self._fetch_async(ticker)
+            price = athn = athn_date = low_since_ath = None
+        else:
+            price, athn, athn_date, low_since_ath = data
+
+        self._render_header(f"--- {name} ({ticker}) ---",
+                            f"Manual ATH (athv): {athv:,.2f} USD (Date: {athv_date})")
+        self._render_buyplan(buyplan, athn if price is not None else None)
+        self._render_sellplan_interactive(plan_id, "DinamicDCA", sellplan, disabled_mask, athv, 'ATHV')
+        self._render_dca_analysis(plan_id, ticker, price, athn, athn_date, low_since_ath)
+
+    def _render_header(self, title, subtitle):
+        """Renders the plan title block at the top of the details pane."""
+        self._pack_label(title, "h1")
+        self._pack_label(subtitle, "bold")
+        self._pack_separator()
+
+    def _render_buyplan(self, buyplan, athn):
+        """Renders the static buy plan section (DinamicDCA only)."""
         self._pack_label("Buy Plan", "h2_plan")
-        if price is not None:
+        if athn is not None:
             self._display_static_buy_plan(buyplan, athn, 'buy-dca', 'ATHN')
         else:
             self._pack_label("Waiting for API data...", "plan_text")
-        
-        ttk.Separator(self.details_content_frame, orient='horizontal').pack(fill='x', pady=10)
+        self._pack_separator()
+
+    def _render_sellplan_interactive(self, plan_id, plan_type, sellplan, disabled_mask, base_price, base_price_label):
+        """Renders the sell plan section with its enable/disable checkboxes."""
         self._pack_label("Sell Plan (Enable/Disable)", "h2_plan")
-        self._display_interactive_sell_plan(plan_id, "DinamicDCA", sellplan, sellplan_disabled, athv, 'ATHV')
+        self._display_interactive_sell_plan(plan_id, plan_type, sellplan, disabled_mask, base_price, base_price_label)
+        self._pack_separator()
 
-        ttk.Separator(self.details_content_frame, orient='horizontal').pack(fill='x', pady=10)
+    def _render_dca_analysis(self, plan_id, ticker, price, athn, athn_date, low_since_ath):
+        """Renders the real-time analysis section and its recommendations sub-frame."""
         self._pack_label("Real-Time Analysis", "h2")
-        
+
         if price is None or athn is None or low_since_ath is None:
-            self._pack_label(f"Could not retrieve data for {ticker}.", "error")
-        else:
-            price_as_perc_of_ath = (price / athn) * 100
-            current_drop_from_ath = ((athn - price) / athn) * 100
-            max_drop_from_ath = ((athn - low_since_ath) / athn) * 100
-            
-            self._pack_label(f"Current Price (price): {price:,.2f} USD")
-            self._pack_label(f"Current Real ATH (athn): {athn:,.2f} USD (Date: {athn_date.strftime('%Y-%m-%d')})")
-            self._pack_label(f"Current Price over ATH: {price_as_perc_of_ath:.2f}%", "bold_green")
-            self._pack_label(f"Current Drop from ATH: {current_drop_from_ath:.2f}%", "bold")
-            self._pack_label(f"Maximum Drop from ATH: {max_drop_from_ath:.2f}%", "bold_red")
-            
-            ttk.Separator(self.details_content_frame, orient='horizontal').pack(fill='x', pady=10)
-            self._pack_label("Recommended Actions", "h2")
-            
-            # Buy logic
-            buy_action = "No buy action."
-            if buyplan:
-                rules = buyplan.split(';')
-                for rule in rules:
-                    parts = rule.strip().split(',')
-                    try:
-                        if len(parts) == 2:
-                            target_perc, amount = float(parts[0]), float(parts[1])
-                            if price <= athn * target_perc:
-                                buy_action = f"BUY {amount}€ (Price <= {athn * target_perc:,.2f} USD)"
-                                break
-                        elif len(parts) == 3:
-                            upper_perc, lower_perc, amount = float(parts[0]), float(parts[1]), float(parts[2])
-                            if athn * lower_perc <= price <= athn * upper_perc:
-                                buy_action = f"BUY {amount}€ (Price between {athn * lower_perc:,.2f} and {athn * upper_perc:,.2f} USD)"
-                                break
-                    except (ValueError, IndexError):
-                        continue
-            self._pack_label(f"Buy: {buy_action}", "buy")
-            
-            # Sell logic with disabled check
-            sell_action = "No sell action."
-            disabled_indices = [int(i) for i in sellplan_disabled.split(';') if i]
-            if sellplan:
-                rules = sellplan.split(';')
-                for i, rule in enumerate(rules):
-                    if i in disabled_indices: continue # Skip disabled rule
-                    parts = rule.strip().split(',')
-                    try:
-                        if len(parts) == 2:
-                            target_perc, position_perc = float(parts[0]), float(parts[1])
-                            if price >= athv * target_perc:
-                                sell_action = f"SELL {position_perc}% of position (Price >= {athv * target_perc:,.2f} USD)"
-                                break
-                    except (ValueError, IndexError): continue
-            self._pack_label(f"Sell: {sell_action}", "sell")
+            if ticker in self._pending_fetches:
+                self._pack_label(f"Loading data for {ticker}...", "plan_text")
+            else:
+                self._pack_label(f"Could not retrieve data for {ticker}.", "error")
+            return
+
+        price_as_perc_of_ath = (price / athn) * 100
+        current_drop_from_ath = ((athn - price) / athn) * 100
+        max_drop_from_ath = ((athn - low_since_ath) / athn) * 100
+
+        self._pack_label(f"Current Price (price): {price:,.2f} USD")
+        self._pack_label(f"Current Real ATH (athn): {athn:,.2f} USD (Date: {athn_date.strftime('%Y-%m-%d')})")
+        self._pack_label(f"Current Price over ATH: {price_as_perc_of_ath:.2f}%", "bold_green")
+        self._pack_label(f"Current Drop from ATH: {current_drop_from_ath:.2f}%", "bold")
+        self._pack_label(f"Maximum Drop from ATH: {max_drop_from_ath:.2f}%", "bold_red")
+
+        self._rec_frame = ttk.Frame(self.details_content_frame)
+        self._rec_frame.pack(fill='x', anchor='w')
+        self._render_dca_recommendations(plan_id)
+
+    def _render_dca_recommendations(self, plan_id):
+        """(Re)builds the "Recommended Actions" section for a DinamicDCA plan."""
+        if not (self._rec_frame and self._rec_frame.winfo_exists()):
+            return
+        for widget in self._rec_frame.winfo_children():
+            widget.destroy()
+
+        plan = self.db.get_dinamic_dca(plan_id)
+        if not plan:
+            return
+        _, _, ticker, athv, _, buyplan, sellplan, _, disabled_mask = plan
+
+        data = self.api.peek(ticker)
+        if data is None:
+            # Cache expired since the last render: fetch in the background,
+            # which re-displays the details (and this section) when done
+            self._fetch_async(ticker)
+            return
+        if data[0] is None:
+            return
+        price, athn, _, _ = data
+
+        self._pack_separator(parent=self._rec_frame)
+        self._pack_label("Recommended Actions", "h2", parent=self._rec_frame)
+
+        # Buy logic: vectorized over the pre-parsed rule arrays; the first
+        # matching rule wins, as before
+        buy_action = "No buy action."
+        buy = parse_buy_plan(buyplan)
+        hits = (buy.lowers * athn <= price) & (price <= buy.uppers * athn)
+        if hits.any():
+            i = int(hits.argmax())
+            if np.isneginf(buy.lowers[i]):
+                buy_action = f"BUY {buy.amounts[i]}€ (Price <= {athn * buy.uppers[i]:,.2f} USD)"
+            else:
+                buy_action = f"BUY {buy.amounts[i]}€ (Price between {athn * buy.lowers[i]:,.2f} and {athn * buy.uppers[i]:,.2f} USD)"
+        self._pack_label(f"Buy: {buy_action}", "buy", parent=self._rec_frame)
+
+        # Sell logic with disabled check
+        sell_action = match_sell_rule(sellplan, athv, price, disabled_mask) or "No sell action."
+        self._pack_label(f"Sell: {sell_action}", "sell", parent=self._rec_frame)
 
     def display_cryptopips_details(self, plan_id):
         """Fetches and displays details for a Cryptopips plan."""
-        plan = next((p for p in self.db.get_all_cryptopips() if p[0] == plan_id), None)
+        plan = self.db.get_cryptopips(plan_id)
         if not plan: return
         
         self.clear_details()
-        _, name, ticker, precio_compra, sellplan, sellplan_disabled = plan
+        _, name, ticker, precio_compra, sellplan, _, disabled_mask = plan
 
-        self._pack_label(f"--- {name} ({ticker}) ---", "h1")
-        self._pack_label(f"Buy Price: {precio_compra:,.2f} USD", "bold")
-        ttk.Separator(self.details_content_frame, orient='horizontal').pack(fill='x', pady=10)
+        data = self.api.peek(ticker)
+        if data is None:
+            self._fetch_async(ticker)
+            price = None
+        else:
+            price = data[0]
 
-        self._pack_label("Sell Plan (Enable/Disable)", "h2_plan")
-        self._display_interactive_sell_plan(plan_id, "Cryptopips", sellplan, sellplan_disabled, precio_compra, 'Buy Price')
+        self._render_header(f"--- {name} ({ticker}) ---",
+                            f"Buy Price: {precio_compra:,.2f} USD")
+        self._render_sellplan_interactive(plan_id, "Cryptopips", sellplan, disabled_mask, precio_compra, 'Buy Price')
+        self._render_pips_analysis(plan_id, ticker, price, precio_compra)
 
-        ttk.Separator(self.details_content_frame, orient='horizontal').pack(fill='x', pady=10)
+    def _render_pips_analysis(self, plan_id, ticker, price, precio_compra):
+        """Renders the real-time analysis section and its recommendations sub-frame."""
         self._pack_label("Real-Time Analysis", "h2")
 
-        price, _, _, _ = self.api.get_crypto_data(ticker)
-
         if price is None:
-            self._pack_label(f"Could not retrieve data for {ticker}.", "error")
-        else:
-            profit_perc = ((price - precio_compra) / precio_compra) * 100
-            self._pack_label(f"Current Price: {price:,.2f} USD")
-            self._pack_label(f"Current Profit/Loss: {profit_perc:.2f}%", "bold")
-            
-            ttk.Separator(self.details_content_frame, orient='horizontal').pack(fill='x', pady=10)
-            self._pack_label("Recommended Actions", "h2")
-            
-            # CORRECTED: Sell logic for Cryptopips
-            sell_action = "No sell action."
-            disabled_indices = [int(i) for i in sellplan_disabled.split(';') if i]
-            if sellplan:
-                rules = sellplan.split(';')
-                for i, rule in enumerate(rules):
-                    if i in disabled_indices: continue
-                    parts = rule.strip().split(',')
-                    try:
-                        if len(parts) == 2:
-                            target_multiplier, position_perc = float(parts[0]), float(parts[1])
-                            target_price = precio_compra * target_multiplier
-                            if price >= target_price:
-                                sell_action = f"SELL {position_perc}% of position (Price >= {target_price:,.2f} USD)"
-                                break
-                    except (ValueError, IndexError): continue
-            self._pack_label(f"Sell: {sell_action}", "sell")
+            if ticker in self._pending_fetches:
+                self._pack_label(f"Loading data for {ticker}...", "plan_text")
+            else:
+                self._pack_label(f"Could not retrieve data for {ticker}.", "error")
+            return
+
+        profit_perc = ((price - precio_compra) / precio_compra) * 100
+        self._pack_label(f"Current Price: {price:,.2f} USD")
+        self._pack_label(f"Current Profit/Loss: {profit_perc:.2f}%", "bold")
+
+        self._rec_frame = ttk.Frame(self.details_content_frame)
+        self._rec_frame.pack(fill='x', anchor='w')
+        self._render_pips_recommendations(plan_id)
+
+    def _render_pips_recommendations(self, plan_id):
+        """(Re)builds the "Recommended Actions" section for a Cryptopips plan."""
+        if not (self._rec_frame and self._rec_frame.winfo_exists()):
+            return
+        for widget in self._rec_frame.winfo_children():
+            widget.destroy()
+
+        plan = self.db.get_cryptopips(plan_id)
+        if not plan:
+            return
+        _, _, ticker, precio_compra, sellplan, _, disabled_mask = plan
+
+        data = self.api.peek(ticker)
+        if data is None:
+            # Cache expired since the last render: fetch in the background,
+            # which re-displays the details (and this section) when done
+            self._fetch_async(ticker)
+            return
+        if data[0] is None:
+            return
+        price = data[0]
+
+        self._pack_separator(parent=self._rec_frame)
+        self._pack_label("Recommended Actions", "h2", parent=self._rec_frame)
+
+        sell_action = match_sell_rule(sellplan, precio_compra, price, disabled_mask) or "No sell action."
+        self._pack_label(f"Sell: {sell_action}", "sell", parent=self._rec_frame)
 
     def add_plan(self):
         """Opens a dialog to add a new plan."""
@@ -473,12 +1078,12 @@ class App(tk.Tk):
         plan_type = self.current_plan_type.get()
 
         if plan_type == "DinamicDCA":
-            plan = next((p for p in self.db.get_all_dinamic_dca() if p[0] == selected_id), None)
+            plan = self.db.get_dinamic_dca(selected_id)
             dialog = PlanDialog(self, title="Edit DinamicDCA Plan", initial_data=plan)
             if dialog.result:
                 self.db.update_dinamic_dca(selected_id, *dialog.result)
         else: # Cryptopips
-            plan = next((p for p in self.db.get_all_cryptopips() if p[0] == selected_id), None)
+            plan = self.db.get_cryptopips(selected_id)
             dialog = PlanDialog(self, title="Edit Cryptopips Plan", plan_type="Cryptopips", initial_data=plan)
             if dialog.result:
                 self.db.update_cryptopips(selected_id, *dialog.result)